@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+from OCR import OCR_IMAGE, OCR_FEATURES, print_ocr_results
+from caption import CAPTION_IMAGE, CAPTION_FEATURES, print_caption_results
+from objects import OBJECTS_IMAGE, OBJECTS_FEATURES, print_objects_results
+from vision_client import analyze_async, close_async_client, get_async_client, preprocess_for_vision
+
+# Azure AI Vision allows 15 transactions per second by default. Keep at most
+# that many requests in flight; if your resource has been granted a higher TPS
+# quota (request it through an Azure support ticket), raise this to match.
+MAX_CONCURRENT_REQUESTS = 15
+
+async def analyze_image(image_path, visual_features, detail="high", **kwargs):
+  # Load and downscale the image off the event loop, so the other requests
+  # keep progressing while the file is read and re-encoded
+  image_data = await asyncio.to_thread(preprocess_for_vision, image_path, detail)
+
+  return await analyze_async(
+    image_data,
+    visual_features=visual_features,
+    **kwargs
+  )
+
+async def analyze_images(image_paths, visual_features, **kwargs):
+  # Submit every image in parallel, capped at the service quota
+  semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+  async def analyze_with_limit(image_path):
+    async with semaphore:
+      return await analyze_image(image_path, visual_features, **kwargs)
+
+  return await asyncio.gather(*(analyze_with_limit(path) for path in image_paths))
+
+async def caption_images(image_paths):
+  try:
+    # Create the client (and check the credentials) before starting any tasks,
+    # so missing settings stop the run here rather than inside every task
+    get_async_client()
+    # Only captions are printed, so request nothing else; they do not need
+    # full resolution either
+    results = await analyze_images(image_paths, ["caption"], detail="low", gender_neutral_caption=True)
+  finally:
+    await close_async_client()
+
+  for image_path, result in zip(image_paths, results):
+    print(f"{image_path}:")
+    print_caption_results(result)
+
+def caption_options(visual_features):
+  # Only send the caption option with requests that produce captions, so the
+  # request (and its cache key) matches what the sample scripts send
+  if "caption" in visual_features or "denseCaptions" in visual_features:
+    return {"gender_neutral_caption": True}
+  return {}
+
+async def run_azure_vision_demo(image_path=None):
+  # Each demo uses its own sample image unless a single image is given for all
+  demos = [
+    (image_path or OCR_IMAGE, OCR_FEATURES, print_ocr_results),
+    (image_path or CAPTION_IMAGE, CAPTION_FEATURES, print_caption_results),
+    (image_path or OBJECTS_IMAGE, OBJECTS_FEATURES, print_objects_results),
+  ]
+
+  # Demos sharing an image are served by one request asking for all of their
+  # features, so the image is uploaded and analyzed only once
+  features = {}
+  for path, demo_features, _ in demos:
+    features.setdefault(path, {}).update(dict.fromkeys(demo_features))
+  paths = list(features)
+
+  # The analyses are independent, so run them concurrently: the total wait is
+  # roughly the slowest call instead of the sum of all of them.
+  try:
+    # Create the client (and check the credentials) before starting any tasks
+    get_async_client()
+    # Read and downscale every distinct image once, however many demos use it
+    images = await asyncio.gather(
+      *(asyncio.to_thread(preprocess_for_vision, path) for path in paths)
+    )
+    results = dict(zip(paths, await asyncio.gather(*(
+      analyze_async(image_data, list(features[path]), **caption_options(features[path]))
+      for path, image_data in zip(paths, images)
+    ))))
+  finally:
+    await close_async_client()
+
+  for path, _, print_results in demos:
+    print_results(results[path])
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Azure AI Vision demo")
+  parser.add_argument("images", nargs="*", help="caption each of these images (paths or http(s) URLs) instead of running the demo")
+  parser.add_argument("--demo-image", help="run every demo on this one image instead of the samples")
+  args = parser.parse_args()
+
+  if args.images:
+    asyncio.run(caption_images(args.images))
+  else:
+    asyncio.run(run_azure_vision_demo(args.demo_image))
@@ -1,39 +1,12 @@
-import os
-from dotenv import load_dotenv
-from azure.ai.vision.imageanalysis import ImageAnalysisClient
-from azure.ai.vision.imageanalysis.models import VisualFeatures
-from azure.core.credentials import AzureKeyCredential
+from vision_client import analyze, preprocess_for_vision
 
-load_dotenv()
+OBJECTS_IMAGE = "sample.jpg"
+# VisualFeatures values, spelled out so importing this module does not load the SDK
+OBJECTS_FEATURES = ["objects"]
 
-def sample_objects_image_file():
-  # Set the values of your computer vision endpoint and computer vision key
-  # as environment variables:
-  endpoint = os.getenv("VISION_ENDPOINT")
-  key = os.getenv("VISION_KEY")
-  
-  if not endpoint or not key:
-    print("Missing environment variable 'VISION_ENDPOINT' or 'VISION_KEY'")
-    print("Set them before running this sample.")
-    exit()
-
-  # Create an Image Analysis client
-  client = ImageAnalysisClient(
-    endpoint=endpoint,
-    credential=AzureKeyCredential(key)
-  )
-
-  # Load image to analyze into a 'bytes' object
-  with open("sample.jpg", "rb") as f:
-    image_data = f.read()
-
-  # Detect objects in an image stream. This will be a synchronously (blocking) call.
-  result = client.analyze(
-    image_data=image_data,
-    visual_features=[VisualFeatures.OBJECTS]
-  )
-
-  # Print Objects analysis results to the console
+def print_objects_results(result):
+  # Print Objects analysis results to the console. Boxes and size are those of
+  # the uploaded image; preprocess_for_vision() reports when it was resized.
   print("Image analysis results:")
   print(" Objects:")
   if result.objects is not None:
@@ -43,5 +16,17 @@ def sample_objects_image_file():
   print(f" Image width: {result.metadata.width}")
   print(f" Model version: {result.model_version}")
 
+def sample_objects_image_file():
+  # Load image to analyze into a 'bytes' object, downscaled for upload
+  image_data = preprocess_for_vision(OBJECTS_IMAGE)
+
+  # Detect objects in an image stream. Results are served from the local cache when available.
+  result = analyze(
+    image_data,
+    visual_features=OBJECTS_FEATURES
+  )
+
+  print_objects_results(result)
+
 if __name__ == "__main__":
-  sample_objects_image_file()
\ No newline at end of file
+  sample_objects_image_file()
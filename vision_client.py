@@ -0,0 +1,301 @@
+import hashlib
+import os
+import re
+import sys
+import tempfile
+import warnings
+import orjson
+from io import BytesIO
+from pathlib import Path
+from dotenv import load_dotenv
+
+# asyncio, PIL, requests, aiohttp and the Azure SDK are imported inside the functions
+# that use them: they are slow to load and a cached run may need none of them.
+
+load_dotenv()
+
+# One client (and one HTTP connection pool) shared by every sample, so repeated
+# calls reuse the keep-alive connection instead of a new TCP + TLS handshake.
+_client = None
+_async_client = None
+_async_session = None
+
+# Longest side, in pixels, an image is scaled down to before upload. "low" is
+# enough for captions and tags; keep "high" for reading small text.
+MAX_DIMENSIONS = {"high": 2048, "low": 512}
+
+# Largest image the service accepts, in pixels (16000 x 16000)
+SERVICE_MAX_PIXELS = 16000 * 16000
+
+# EXIF tag holding the camera orientation of a photo
+ORIENTATION_TAG = 0x0112
+
+# Results are cached on disk by image content and request options, so running
+# a sample again on the same image does not spend another billed call. Delete
+# the directory (or point VISION_CACHE_DIR elsewhere) to start fresh.
+CACHE_DIR = Path(os.getenv("VISION_CACHE_DIR") or Path.home() / ".cache" / "azvision")
+
+# Retry throttled (429) and transient 5xx responses with exponential backoff,
+# waiting as long as the Retry-After header asks when the service sends one.
+# azure-core only retries idempotent methods on 429 by default; analyze has no
+# side effects, so POST is allowed too.
+RETRY_OPTIONS = {"retry_total": 5, "retry_backoff_factor": 0.5}
+RETRY_METHODS = ["HEAD", "GET", "PUT", "DELETE", "OPTIONS", "TRACE", "POST"]
+
+def _get_credentials():
+  # Set the values of your computer vision endpoint and computer vision key
+  # as environment variables:
+  endpoint = os.getenv("VISION_ENDPOINT")
+  key = os.getenv("VISION_KEY")
+
+  if not endpoint or not key:
+    print("Missing environment variable 'VISION_ENDPOINT' or 'VISION_KEY'")
+    print("Set them before running this sample.")
+    exit()
+
+  from azure.core.credentials import AzureKeyCredential
+  return endpoint, AzureKeyCredential(key)
+
+def _create_session():
+  import requests
+  from requests.adapters import HTTPAdapter
+  from urllib3.util.retry import Retry
+
+  session = requests.Session()
+  # A session handed to RequestsTransport is used as-is, so replicate the
+  # transport's own setup: retries are left to the azure-core pipeline.
+  # The default adapter keeps only 10 connections per host; size the pool for
+  # concurrent callers so connections are reused instead of reopened.
+  adapter = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(total=False, redirect=False, raise_on_status=False)
+  )
+  session.mount("https://", adapter)
+  session.mount("http://", adapter)
+  return session
+
+def is_image_url(image_source):
+  return isinstance(image_source, str) and re.match(r"^https?://", image_source) is not None
+
+def read_image_bytes(image_path):
+  # Read the whole file with a sequential-access hint where the OS supports
+  # it, so the kernel reads ahead aggressively on large images.
+  if not hasattr(os, "posix_fadvise"):
+    return Path(image_path).read_bytes()
+
+  fd = os.open(image_path, os.O_RDONLY)
+  try:
+    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+    size = os.fstat(fd).st_size
+    chunks = []
+    while size > 0:
+      chunk = os.read(fd, size)
+      if not chunk:
+        break
+      chunks.append(chunk)
+      size -= len(chunk)
+    return b"".join(chunks)
+  finally:
+    os.close(fd)
+
+def preprocess_for_vision(image_path, detail="high", max_dim=None):
+  # Shrink the image so it fits in max_dim x max_dim and re-encode it as JPEG:
+  # the upload gets much smaller while staying well above what the models need.
+  # Bounding boxes in the results refer to the resized image, and a note is
+  # printed to stderr whenever that differs from the file on disk.
+  # URLs are returned unchanged, the service downloads those images itself.
+  if is_image_url(image_path):
+    return image_path
+
+  from PIL import Image, ImageOps, UnidentifiedImageError
+
+  if max_dim is None:
+    max_dim = MAX_DIMENSIONS[detail]
+
+  image_data = read_image_bytes(image_path)
+  # The service takes images up to 16000x16000, more than Pillow's default
+  # decompression-bomb limit; this only shrinks the image, so allow that size
+  Image.MAX_IMAGE_PIXELS = SERVICE_MAX_PIXELS
+  try:
+    with warnings.catch_warnings():
+      warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+      img = Image.open(BytesIO(image_data))
+  except (UnidentifiedImageError, Image.DecompressionBombError):
+    # Files Pillow cannot (or will not) read are sent unchanged for the
+    # service to accept or reject
+    return image_data
+  if img.width * img.height > SERVICE_MAX_PIXELS:
+    # Too large for the service anyway; do not decode it just to be rejected
+    img.close()
+    return image_data
+
+  with img:
+    # Image.open only parses the header; an upright JPEG that already fits is
+    # sent as-is, without decoding or re-encoding the pixels
+    upright = img.getexif().get(ORIENTATION_TAG, 1) == 1
+    if img.format == "JPEG" and upright and max(img.size) <= max_dim:
+      return image_data
+
+    # The re-encoded JPEG carries no EXIF, so apply the Orientation tag to the
+    # pixels first or rotated photos (most phone shots) are uploaded sideways
+    img = ImageOps.exif_transpose(img)
+    original_size = img.size
+    img.thumbnail((max_dim, max_dim), Image.Resampling.LANCZOS)
+    if img.size != original_size:
+      # Bounding boxes and the image size in the results describe the upload;
+      # say so on stderr so the results on stdout stay clean
+      print(f"Note: '{image_path}' was resized from {original_size[0]}x{original_size[1]} "
+            f"to {img.width}x{img.height} for upload; any coordinates in the results refer to the resized image.",
+            file=sys.stderr)
+    if img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info):
+      # JPEG has no alpha: flatten onto white so transparent areas do not turn
+      # black and hide dark text or logos drawn on them
+      img = img.convert("RGBA")
+      background = Image.new("RGB", img.size, "white")
+      background.paste(img, mask=img.getchannel("A"))
+      img = background
+    elif img.mode not in ("RGB", "L"):
+      img = img.convert("RGB")
+    buffer = BytesIO()
+    img.save(buffer, format="JPEG", quality=85)
+  return buffer.getvalue()
+
+def get_client():
+  global _client
+  if _client is None:
+    from azure.ai.vision.imageanalysis import ImageAnalysisClient
+    from azure.core.pipeline.transport import RequestsTransport
+
+    endpoint, credential = _get_credentials()
+    _client = ImageAnalysisClient(
+      endpoint=endpoint,
+      credential=credential,
+      transport=RequestsTransport(session=_create_session()),
+      **RETRY_OPTIONS
+    )
+  return _client
+
+def _create_async_session():
+  import aiohttp
+
+  # Same settings AioHttpTransport uses for the session it creates itself, plus
+  # a connector sized like the sync pool (64 connections per host) so concurrent
+  # requests share a bounded set of keep-alive sockets.
+  return aiohttp.ClientSession(
+    connector=aiohttp.TCPConnector(limit=64, limit_per_host=64),
+    cookie_jar=aiohttp.DummyCookieJar(),
+    auto_decompress=False,
+    trust_env=True
+  )
+
+def get_async_client():
+  # The aiohttp session is bound to the running event loop, so this must be
+  # called from inside a coroutine and paired with close_async_client().
+  global _async_client, _async_session
+  if _async_client is None:
+    from azure.ai.vision.imageanalysis.aio import ImageAnalysisClient as AsyncImageAnalysisClient
+    from azure.core.pipeline.transport import AioHttpTransport
+
+    endpoint, credential = _get_credentials()
+    _async_session = _create_async_session()
+    _async_client = AsyncImageAnalysisClient(
+      endpoint=endpoint,
+      credential=credential,
+      transport=AioHttpTransport(session=_async_session, session_owner=False),
+      **RETRY_OPTIONS
+    )
+  return _async_client
+
+async def close_async_client():
+  global _async_client, _async_session
+  if _async_client is not None:
+    await _async_client.close()
+    await _async_session.close()
+    _async_client = None
+    _async_session = None
+
+def _cache_path(image_data, visual_features, **kwargs):
+  key = hashlib.sha256(image_data)
+  key.update(",".join(sorted(visual_features)).encode())
+  key.update(repr(sorted(kwargs.items())).encode())
+  return CACHE_DIR / f"{key.hexdigest()}.json"
+
+def _load_cached(path):
+  try:
+    data = path.read_bytes()
+  except FileNotFoundError:
+    return None
+
+  from azure.ai.vision.imageanalysis.models import ImageAnalysisResult
+  try:
+    return ImageAnalysisResult(orjson.loads(data))
+  except (ValueError, TypeError, AttributeError):
+    # A corrupt entry (e.g. left by an older, non-atomic write) is a miss;
+    # drop it so the next successful call replaces it
+    path.unlink(missing_ok=True)
+    return None
+
+def _store_cached(path, result):
+  # Write to a temporary file and rename it into place, so an interrupted run
+  # or two writers racing on the same key never leave a truncated entry
+  path.parent.mkdir(parents=True, exist_ok=True)
+  fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+  try:
+    with os.fdopen(fd, "wb") as f:
+      f.write(orjson.dumps(result.as_dict()))
+    os.replace(temp_path, path)
+  except BaseException:
+    os.unlink(temp_path)
+    raise
+
+# analyze() and analyze_async() take either the image bytes or an http(s) URL.
+# A URL is sent as-is so the service fetches the image itself; for images in
+# Azure Blob Storage, keep the account in the same region as the Vision
+# resource. URL results are not cached, as the content behind them can change.
+
+def analyze(image_source, visual_features, **kwargs):
+  if is_image_url(image_source):
+    # This will be a synchronously (blocking) call.
+    return get_client().analyze_from_url(
+      image_url=image_source,
+      visual_features=visual_features,
+      retry_on_methods=RETRY_METHODS,
+      **kwargs
+    )
+
+  path = _cache_path(image_source, visual_features, **kwargs)
+  result = _load_cached(path)
+  if result is None:
+    # This will be a synchronously (blocking) call.
+    result = get_client().analyze(
+      image_data=image_source,
+      visual_features=visual_features,
+      retry_on_methods=RETRY_METHODS,
+      **kwargs
+    )
+    _store_cached(path, result)
+  return result
+
+async def analyze_async(image_source, visual_features, **kwargs):
+  import asyncio
+
+  if is_image_url(image_source):
+    return await get_async_client().analyze_from_url(
+      image_url=image_source,
+      visual_features=visual_features,
+      retry_on_methods=RETRY_METHODS,
+      **kwargs
+    )
+
+  path = _cache_path(image_source, visual_features, **kwargs)
+  result = await asyncio.to_thread(_load_cached, path)
+  if result is None:
+    result = await get_async_client().analyze(
+      image_data=image_source,
+      visual_features=visual_features,
+      retry_on_methods=RETRY_METHODS,
+      **kwargs
+    )
+    await asyncio.to_thread(_store_cached, path, result)
+  return result